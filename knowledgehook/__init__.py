@@ -1,9 +1,12 @@
 from .algebra import (
     activate,
+    activate_best,
     cascade,
     combine_hooks,
     compose_flat,
+    compose_flat_all,
     compose_nested,
+    compose_nested_all,
     equivalent,
     execute,
     learn_delta,
@@ -12,16 +15,39 @@ from .algebra import (
     rollback,
     update_stats,
 )
-from .semantics import andP, eval_condition, eval_hook, normalize_condition, notP, orP
-from .store import default_policy, delete_hook, empty_store, insert_hook, lookup_hook, update_hook
+from .semantics import (
+    andP,
+    compile_condition,
+    eval_condition,
+    eval_condition_batch,
+    eval_hook,
+    normalize_condition,
+    notP,
+    orP,
+)
+from .store import (
+    HookStoreBuilder,
+    bulk_insert,
+    default_policy,
+    delete_hook,
+    empty_store,
+    insert_hook,
+    lookup_hook,
+    optimize_store,
+    store_evict,
+    update_hook,
+)
 from .types import *
 
 __all__ = [
     "activate",
+    "activate_best",
     "cascade",
     "combine_hooks",
     "compose_flat",
+    "compose_flat_all",
     "compose_nested",
+    "compose_nested_all",
     "equivalent",
     "execute",
     "learn_delta",
@@ -30,15 +56,21 @@ __all__ = [
     "rollback",
     "update_stats",
     "andP",
+    "compile_condition",
     "eval_condition",
+    "eval_condition_batch",
     "eval_hook",
     "normalize_condition",
     "notP",
     "orP",
+    "HookStoreBuilder",
+    "bulk_insert",
     "default_policy",
     "delete_hook",
     "empty_store",
     "insert_hook",
     "lookup_hook",
+    "optimize_store",
+    "store_evict",
     "update_hook",
 ]
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import replace
-from datetime import timedelta
-
-from .semantics import andP, eval_condition, normalize_condition, orP
+import operator
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from functools import lru_cache, reduce
+from types import MappingProxyType
+from typing import Callable, Optional
+
+from .semantics import _Expansion, _rewrite, andP, inApp, orP
+from .store import insert_hook
 from .types import (
     Action,
     Alpha,
@@ -11,6 +17,7 @@ from .types import (
     AppValue,
     BoolValue,
     ClickElement,
+    Condition,
     Context,
     Correction,
     Cost,
@@ -21,6 +28,7 @@ from .types import (
     FalseP,
     HasText,
     Hook,
+    HookId,
     HookMatch,
     HookStore,
     InApp,
@@ -56,53 +64,231 @@ def estimate_cost(action: Action, _ctx: Context) -> Cost:
     return action.action_plan.plan_cost
 
 
+def _activation_candidates(store: HookStore, ctx: Context) -> set[HookId]:
+    index = store.activation_index
+    candidates = set(index.get(TrueP(), ()))
+    if ctx.app is not None:
+        candidates.update(index.get(InApp(ctx.app), ()))
+    for feature, value in ctx.features.items():
+        candidates.update(index.get(FeatureEq(feature, value), ()))
+    return candidates
+
+
+_ACTIVATION_CACHE_SIZE = 256
+
+# Guards eviction and insertion in every store's activation cache, so concurrent
+# activations on one store cannot both evict the same oldest entry.
+_ACTIVATION_CACHE_LOCK = threading.Lock()
+
+
+def _select_best(hooks: tuple[Hook, ...], ctx: Context) -> tuple[Hook | None, Cost]:
+    # prioritize's argmin over (cost, -success), as a scalar loop without HookMatch objects.
+    best_hook: Hook | None = None
+    best_cost = 0.0
+    best_neg_success = 0.0
+    for hook in hooks:
+        cost = estimate_cost(hook.hook_action, ctx)
+        neg_success = -hook.hook_stats.stats_success
+        if best_hook is None or cost < best_cost or (cost == best_cost and neg_success < best_neg_success):
+            best_hook, best_cost, best_neg_success = hook, cost, neg_success
+    return best_hook, best_cost
+
+
+def _activation_entry(store: HookStore, ctx: Context) -> tuple[tuple[Hook, ...], Hook | None, Cost]:
+    # Stores are immutable and every update builds a new one with an empty cache,
+    # so a per-store memo keyed on the (hashable, content-compared) context never
+    # goes stale. Each entry holds the matching hooks and the best of them, so
+    # repeated activate_best calls on the same context are a dict lookup.
+    cache = store.activation_cache
+    entry = cache.get(ctx)
+    if entry is None:
+        # Only the candidates are sorted into insertion order; ids that deleted hooks left in
+        # the index have no position. The anchor is only a pre-filter, so the predicate decides.
+        positions = store.hook_positions
+        candidates = [i for i in _activation_candidates(store, ctx) if i in positions]
+        ordered = sorted(candidates, key=positions.__getitem__)
+        hooks = store.hooks
+        matched = tuple(hooks[i] for i in ordered if hooks[i].hook_predicate(ctx))
+        entry = (matched, *_select_best(matched, ctx))
+        with _ACTIVATION_CACHE_LOCK:
+            if len(cache) >= _ACTIVATION_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[ctx] = entry
+    return entry
+
+
+def _matching_hooks(store: HookStore, ctx: Context) -> tuple[Hook, ...]:
+    return _activation_entry(store, ctx)[0]
+
+
 def activate(store: HookStore, ctx: Context) -> list[HookMatch]:
-    matches: list[HookMatch] = []
-    for hook in store.hooks.values():
-        if eval_condition(hook.hook_condition, ctx):
-            matches.append(HookMatch(match_hook=hook, match_context=ctx, match_cost=estimate_cost(hook.hook_action, ctx)))
-    return matches
+    return [
+        HookMatch(match_hook=hook, match_context=ctx, match_cost=estimate_cost(hook.hook_action, ctx))
+        for hook in _matching_hooks(store, ctx)
+    ]
+
+
+def activate_best(_policy: Policy, store: HookStore, ctx: Context) -> HookMatch | None:
+    # Fused activate + prioritize: same choice, without building a HookMatch per hook.
+    _matched, best_hook, best_cost = _activation_entry(store, ctx)
+    if best_hook is None:
+        return None
+    return HookMatch(match_hook=best_hook, match_context=ctx, match_cost=best_cost)
+
+
+_MATCH_SORT_KEY = operator.attrgetter("match_sort_key")
 
 
 def prioritize(_policy: Policy, matches: list[HookMatch]) -> HookMatch | None:
     if not matches:
         return None
-    return min(matches, key=lambda m: (m.match_cost, -m.match_hook.hook_stats.stats_success))
+    return min(matches, key=_MATCH_SORT_KEY)
+
+
+_TYPED_TEXT = Feature.get("typed_text", "text")
+_CLICKED_ELEMENT = Feature.get("clicked_element", "ui")
+_SENT_KEYS = Feature.get("sent_keys", "input")
+
+
+def _apply_type_text(op: TypeText, ctx: Context) -> Context:
+    return replace(ctx, features=ctx.features | {_TYPED_TEXT: TextValue(op.text)})
+
+
+def _apply_click(op: ClickElement, ctx: Context) -> Context:
+    return replace(ctx, features=ctx.features | {_CLICKED_ELEMENT: TextValue(op.element)})
+
+
+def _apply_open(op: OpenApp, ctx: Context) -> Context:
+    return replace(ctx, app=op.app)
+
+
+def _apply_send(op: SendKeys, ctx: Context) -> Context:
+    return replace(ctx, features=ctx.features | {_SENT_KEYS: TextValue(op.keys)})
+
+
+def _apply_wait(op: Wait, ctx: Context) -> Context:
+    return replace(ctx, time=ctx.time + timedelta(seconds=op.seconds))
+
+
+def _apply_seq(op: Sequence, ctx: Context) -> Context:
+    return apply_op_sequence(op.ops, ctx)
+
+
+_APPLY_OP_TABLE: dict[type, Callable[[Op, Context], Context]] = {
+    TypeText: _apply_type_text,
+    ClickElement: _apply_click,
+    OpenApp: _apply_open,
+    SendKeys: _apply_send,
+    Wait: _apply_wait,
+    Sequence: _apply_seq,
+}
 
 
 def apply_op(op: Op, ctx: Context) -> Context:
-    if isinstance(op, TypeText):
-        f = Feature("typed_text", "text")
-        new_features = dict(ctx.features)
-        new_features[f] = TextValue(op.text)
-        return replace(ctx, features=new_features)
-    if isinstance(op, ClickElement):
-        f = Feature("clicked_element", "ui")
-        new_features = dict(ctx.features)
-        new_features[f] = TextValue(op.element)
-        return replace(ctx, features=new_features)
-    if isinstance(op, OpenApp):
-        return replace(ctx, app=op.app)
-    if isinstance(op, SendKeys):
-        f = Feature("sent_keys", "input")
-        new_features = dict(ctx.features)
-        new_features[f] = TextValue(op.keys)
-        return replace(ctx, features=new_features)
-    if isinstance(op, Wait):
-        return replace(ctx, time=ctx.time + timedelta(seconds=op.seconds))
-    if isinstance(op, Sequence):
-        out = ctx
-        for inner in op.ops:
-            out = apply_op(inner, out)
-        return out
-    raise TypeError(f"Unsupported op: {op!r}")
+    try:
+        handler = _APPLY_OP_TABLE[type(op)]
+    except KeyError:
+        raise TypeError(f"Unsupported op: {op!r}") from None
+    return handler(op, ctx)
+
+
+@dataclass(slots=True)
+class _ContextDraft:
+    features: dict[Feature, FeatureValue]
+    time: datetime
+    app: Optional[str]
+
+
+def _write_type_text(op: TypeText, draft: _ContextDraft) -> None:
+    draft.features[_TYPED_TEXT] = TextValue(op.text)
+
+
+def _write_click(op: ClickElement, draft: _ContextDraft) -> None:
+    draft.features[_CLICKED_ELEMENT] = TextValue(op.element)
+
+
+def _write_open(op: OpenApp, draft: _ContextDraft) -> None:
+    draft.app = op.app
+
+
+def _write_send(op: SendKeys, draft: _ContextDraft) -> None:
+    draft.features[_SENT_KEYS] = TextValue(op.keys)
+
+
+def _write_wait(op: Wait, draft: _ContextDraft) -> None:
+    draft.time = draft.time + timedelta(seconds=op.seconds)
+
+
+def _write_seq(op: Sequence, draft: _ContextDraft) -> None:
+    # Sequences are flat, so every inner op is atomic.
+    for inner in op.ops:
+        _apply_op_inplace(inner, draft)
+
+
+_APPLY_OP_INPLACE_TABLE: dict[type, Callable[[Op, _ContextDraft], None]] = {
+    TypeText: _write_type_text,
+    ClickElement: _write_click,
+    OpenApp: _write_open,
+    SendKeys: _write_send,
+    Wait: _write_wait,
+    Sequence: _write_seq,
+}
+
+
+def _apply_op_inplace(op: Op, draft: _ContextDraft) -> None:
+    try:
+        handler = _APPLY_OP_INPLACE_TABLE[type(op)]
+    except KeyError:
+        raise TypeError(f"Unsupported op: {op!r}") from None
+    handler(op, draft)
+
+
+# Plans at least this long are compiled once into their net effect and replayed from cache.
+_PLAN_EFFECT_THRESHOLD = 16
+
+# Any fixed start time works: timedelta arithmetic is exact, so the elapsed time is too.
+_EFFECT_EPOCH = datetime(2000, 1, 1)
+
+
+@dataclass(frozen=True, slots=True)
+class _PlanEffect:
+    features: MappingProxyType
+    elapsed: timedelta
+    app: str | None
+    opens_app: bool
+
+
+@lru_cache(maxsize=1024)
+def _plan_effect(ops: tuple[Op, ...]) -> _PlanEffect:
+    # Run the plan against a blank draft: features keeps the last write per feature and
+    # app is only set if an op opens one. The result is frozen because the cache shares it.
+    draft = _ContextDraft(features={}, time=_EFFECT_EPOCH, app=None)
+    for op in ops:
+        _apply_op_inplace(op, draft)
+    return _PlanEffect(
+        features=MappingProxyType(draft.features),
+        elapsed=draft.time - _EFFECT_EPOCH,
+        app=draft.app,
+        opens_app=draft.app is not None,
+    )
 
 
 def apply_op_sequence(ops: tuple[Op, ...], ctx: Context) -> Context:
-    out = ctx
+    if not ops:
+        return ctx
+    if len(ops) >= _PLAN_EFFECT_THRESHOLD:
+        effect = _plan_effect(ops)
+        return replace(
+            ctx,
+            features=ctx.features | effect.features,
+            time=ctx.time + effect.elapsed,
+            app=effect.app if effect.opens_app else ctx.app,
+        )
+    # Copy the features once per plan and let every op write into the draft.
+    draft = _ContextDraft(features=dict(ctx.features), time=ctx.time, app=ctx.app)
     for op in ops:
-        out = apply_op(op, out)
-    return out
+        _apply_op_inplace(op, draft)
+    return replace(ctx, features=draft.features, time=draft.time, app=draft.app)
 
 
 def interpret_outcome_plan(plan: OutcomePlan, ctx: Context) -> tuple[Context, RollbackPlan]:
@@ -128,29 +314,44 @@ def execute(hook: Hook, ctx: Context) -> Outcome:
 def infer_condition(before: Context, after: Context):
     if before.app != after.app:
         if after.app is not None:
-            return InApp(after.app)
+            return inApp(after.app)
         return TrueP()
     return TrueP()
 
 
+_INVERT_TABLE: dict[type, Callable[[Op], Op]] = {
+    TypeText: lambda op: SendKeys("\b" * len(op.text)),
+    ClickElement: lambda op: ClickElement(op.element),
+    OpenApp: lambda op: Wait(0.0),
+    SendKeys: lambda op: SendKeys("\b" * len(op.keys)),
+    Wait: lambda op: Wait(0.0),
+    Sequence: lambda op: Sequence(_invert_flat(op.ops)),
+}
+
+
 def invert_op(op: Op) -> Op:
-    if isinstance(op, TypeText):
-        return SendKeys("\b" * len(op.text))
-    if isinstance(op, ClickElement):
-        return ClickElement(op.element)
-    if isinstance(op, OpenApp):
-        return Wait(0.0)
-    if isinstance(op, SendKeys):
-        return SendKeys("\b" * len(op.keys))
-    if isinstance(op, Wait):
-        return Wait(0.0)
-    if isinstance(op, Sequence):
-        return Sequence(tuple(invert_op(i) for i in reversed(op.ops)))
-    raise TypeError(f"Unsupported op: {op!r}")
+    try:
+        handler = _INVERT_TABLE[type(op)]
+    except KeyError:
+        raise TypeError(f"Unsupported op: {op!r}") from None
+    return handler(op)
+
+
+def _invert_flat(ops: tuple[Op, ...]) -> tuple[Op, ...]:
+    # Popping from the end walks the ops in reverse; sequences (always flat) are spliced in place.
+    out: list[Op] = []
+    stack = list(ops)
+    while stack:
+        op = stack.pop()
+        if type(op) is Sequence:
+            stack.extend(op.ops)
+        else:
+            out.append(invert_op(op))
+    return tuple(out)
 
 
 def create_rollback_plan(ops: tuple[Op, ...]) -> RollbackPlan:
-    return RollbackPlan(rollback_ops=tuple(invert_op(op) for op in reversed(ops)), rollback_context=empty_context())
+    return RollbackPlan(rollback_ops=_invert_flat(ops), rollback_context=empty_context())
 
 
 def infer_action(user_input: UserInput) -> Action:
@@ -164,26 +365,38 @@ def infer_action(user_input: UserInput) -> Action:
     )
 
 
+_ATOM_SPECIFICITY: dict[type, Specificity] = {
+    TrueP: 0.0,
+    FalseP: 1.0,
+    HasText: 0.3,
+    InApp: 0.4,
+    TimeAfter: 0.2,
+    TimeBefore: 0.2,
+    FeatureEq: 0.5,
+}
+
+_EXPAND_SPECIFICITY: dict[type, Callable[[Condition], _Expansion]] = {
+    AndP: lambda c: ((c.left, c.right), operator.add),
+    OrP: lambda c: ((c.left, c.right), min),
+    NotP: lambda c: ((c.cond,), lambda spec: spec),
+}
+
+
+def _expand_specificity(c: Condition) -> _Expansion:
+    expand = _EXPAND_SPECIFICITY.get(type(c))
+    if expand is not None:
+        return expand(c)
+    try:
+        spec = _ATOM_SPECIFICITY[type(c)]
+    except KeyError:
+        raise TypeError(f"Unsupported condition: {c!r}") from None
+    return (), lambda: spec
+
+
+@lru_cache(maxsize=4096)
 def calculate_specificity(condition) -> Specificity:
-    if isinstance(condition, TrueP):
-        return 0.0
-    if isinstance(condition, FalseP):
-        return 1.0
-    if isinstance(condition, HasText):
-        return 0.3
-    if isinstance(condition, InApp):
-        return 0.4
-    if isinstance(condition, TimeAfter) or isinstance(condition, TimeBefore):
-        return 0.2
-    if isinstance(condition, FeatureEq):
-        return 0.5
-    if isinstance(condition, AndP):
-        return calculate_specificity(condition.left) + calculate_specificity(condition.right)
-    if isinstance(condition, OrP):
-        return min(calculate_specificity(condition.left), calculate_specificity(condition.right))
-    if isinstance(condition, NotP):
-        return calculate_specificity(condition.cond)
-    raise TypeError(f"Unsupported condition: {condition!r}")
+    # Iterative, like _condition_cost: composed and refined conditions nest deeply.
+    return _rewrite(condition, _expand_specificity)
 
 
 def learn_delta(alpha: Alpha, before: Snapshot, after: Snapshot, user_input: UserInput, store: HookStore) -> HookStore:
@@ -204,46 +417,52 @@ def learn_delta(alpha: Alpha, before: Snapshot, after: Snapshot, user_input: Use
         ),
         hook_specificity=calculate_specificity(delta_condition),
     )
-    new_hooks = dict(store.hooks)
-    new_hooks[new_hook.hook_id] = new_hook
-    key = repr(normalize_condition(new_hook.hook_condition))
-    new_indices = {k: list(v) for k, v in store.indices.items()}
-    new_indices.setdefault(key, []).append(new_hook.hook_id)
-    return HookStore(hooks=new_hooks, indices=new_indices)
-
-
-def compose_nested(h1: Hook, h2: Hook) -> Hook:
+    return insert_hook(new_hook, store)
+
+
+def _compose_all(
+    hooks: list[Hook],
+    id_sep: str,
+    description_sep: str,
+    combine_condition: Callable[[Condition, Condition], Condition],
+    combine_specificity: Callable[[Specificity, Specificity], Specificity],
+) -> Hook:
+    if not hooks:
+        raise ValueError("Cannot compose an empty list of hooks")
     return Hook(
-        hook_id=f"{h1.hook_id}_then_{h2.hook_id}",
-        hook_condition=andP(h1.hook_condition, h2.hook_condition),
+        hook_id=id_sep.join(h.hook_id for h in hooks),
+        hook_condition=reduce(combine_condition, (h.hook_condition for h in hooks)),
         hook_action=Action(
-            action_plan=h1.hook_action.action_plan + h2.hook_action.action_plan,
-            action_description=f"{h1.hook_action.action_description} then {h2.hook_action.action_description}",
+            action_plan=OutcomePlan.concat_all([h.hook_action.action_plan for h in hooks]),
+            action_description=description_sep.join(h.hook_action.action_description for h in hooks),
         ),
-        hook_stats=combine_stats(h1.hook_stats, h2.hook_stats),
-        hook_meta=combine_metadata(h1.hook_meta, h2.hook_meta),
-        hook_specificity=h1.hook_specificity + h2.hook_specificity,
+        hook_stats=reduce(combine_stats, (h.hook_stats for h in hooks)),
+        hook_meta=reduce(combine_metadata, (h.hook_meta for h in hooks)),
+        hook_specificity=reduce(combine_specificity, (h.hook_specificity for h in hooks)),
     )
 
 
+def compose_nested_all(hooks: list[Hook]) -> Hook:
+    # Same hook as reduce(compose_nested, hooks), without re-copying the growing plan.
+    return _compose_all(hooks, "_then_", " then ", andP, operator.add)
+
+
+def compose_flat_all(hooks: list[Hook]) -> Hook:
+    # Same hook as reduce(compose_flat, hooks), without re-copying the growing plan.
+    return _compose_all(hooks, "_and_", " and ", orP, min)
+
+
+def compose_nested(h1: Hook, h2: Hook) -> Hook:
+    return compose_nested_all([h1, h2])
+
+
 def compose_flat(h1: Hook, h2: Hook) -> Hook:
-    return Hook(
-        hook_id=f"{h1.hook_id}_and_{h2.hook_id}",
-        hook_condition=orP(h1.hook_condition, h2.hook_condition),
-        hook_action=Action(
-            action_plan=h1.hook_action.action_plan + h2.hook_action.action_plan,
-            action_description=f"{h1.hook_action.action_description} and {h2.hook_action.action_description}",
-        ),
-        hook_stats=combine_stats(h1.hook_stats, h2.hook_stats),
-        hook_meta=combine_metadata(h1.hook_meta, h2.hook_meta),
-        hook_specificity=min(h1.hook_specificity, h2.hook_specificity),
-    )
+    return compose_flat_all([h1, h2])
 
 
 def cascade(policy: Policy, store: HookStore, outcome: Outcome) -> list[Hook]:
-    matches = activate(store, outcome.outcome_post)
     if policy.policy_max_cascade_depth > 0:
-        top = prioritize(policy, matches)
+        top = activate_best(policy, store, outcome.outcome_post)
         return [top.match_hook] if top else []
     return []
 
@@ -257,7 +476,8 @@ def refine(general: Hook, specific: Hook) -> Hook:
 
 
 def equivalent(h1: Hook, h2: Hook) -> Equiv:
-    same_condition = normalize_condition(h1.hook_condition) == normalize_condition(h2.hook_condition)
+    n1, n2 = h1.hook_normalized_condition, h2.hook_normalized_condition
+    same_condition = n1 is n2 or n1 == n2
     same_action = h1.hook_action.action_plan == h2.hook_action.action_plan
     return Equiv.EQUIVALENT if same_condition and same_action else Equiv.NOT_EQUIVALENT
 
@@ -279,6 +499,21 @@ def update_stats(alpha: Alpha, hook: Hook, correction: Correction) -> Hook:
     )
 
 
+def update_stats_batch(alpha: Alpha, hooks: list[Hook], corrections: list[Correction]) -> list[Hook]:
+    # Same result as update_stats per hook, with the update rule hoisted out of the loop.
+    keep = 1.0 - alpha
+    updated: list[Hook] = []
+    for hook, correction in zip(hooks, corrections, strict=True):
+        old = hook.hook_stats
+        new_stats = Stats(
+            stats_success=keep * old.stats_success + alpha * (0.0 if correction else 1.0),
+            stats_uses=old.stats_uses + 1,
+            stats_corrections=old.stats_corrections + (1 if correction else 0),
+        )
+        updated.append(replace(hook, hook_stats=new_stats))
+    return updated
+
+
 def rollback(outcome: Outcome, ctx: Context) -> Context:
     return interpret_rollback(outcome.outcome_plan.plan_rollback, ctx)
 
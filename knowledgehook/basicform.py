@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Optional
+
+from .semantics import Predicate, _condition_sort_key, _Expansion, _rewrite, compile_condition
+from .types import AndP, Condition, Context, FalseP, NotP, OrP, TrueP
+
+# Basic forms are reduced, ordered if-then-else graphs over atomic conditions. Each build
+# keeps its own node table and orders atoms cheapest first (ties by structural key), so the
+# graph depends only on the condition; it is serialized into a flat tuple of (atom, hi, lo)
+# nodes that compares equal for conditions equal under the boolean identities. Reduction
+# happens in _node, which drops redundant tests, so a & a, a | a and absorption need no
+# extra pass.
+
+# (root, nodes): references are FALSE, TRUE, or 2 + the position of a node in nodes.
+BasicForm = tuple[int, tuple[tuple[Condition, int, int], ...]]
+
+FALSE = 0
+TRUE = 1
+
+# Graph size depends on the atom order and can be exponential in the number of atoms,
+# so a build gives up once nodes plus apply steps pass this budget.
+_BUILD_BUDGET = 4096
+
+_BF_CACHE_SIZE = 4096
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class _Build:
+    # Position of each atom in the variable order; terminals rank after every atom.
+    rank: dict[Condition, int]
+    nodes: list[tuple[int, int, int]]
+    node_ids: dict[tuple[int, int, int], int] = field(default_factory=dict)
+    not_memo: dict[int, int] = field(default_factory=dict)
+    and_memo: dict[tuple[int, int], int] = field(default_factory=dict)
+    steps: int = 0
+
+
+def _spend(build: _Build) -> None:
+    build.steps += 1
+    if build.steps > _BUILD_BUDGET:
+        raise _BudgetExceeded
+
+
+def _node(build: _Build, rank: int, hi: int, lo: int) -> int:
+    if hi == lo:
+        return hi
+    key = (rank, hi, lo)
+    node = build.node_ids.get(key)
+    if node is None:
+        _spend(build)
+        node = build.node_ids[key] = len(build.nodes)
+        build.nodes.append(key)
+    return node
+
+
+def _not(build: _Build, x: int) -> int:
+    def expand(n: int) -> _Expansion:
+        if n <= TRUE:
+            return (), lambda: TRUE - n
+        if n in build.not_memo:
+            return (), lambda: build.not_memo[n]
+        _spend(build)
+        rank, hi, lo = build.nodes[n]
+
+        def combine(h: int, l: int) -> int:
+            result = build.not_memo[n] = _node(build, rank, h, l)
+            return result
+
+        return (hi, lo), combine
+
+    # Graph depth grows with the number of atoms, so walk it with the iterative driver.
+    return _rewrite(x, expand)
+
+
+def _ordered(x: int, y: int) -> tuple[int, int]:
+    # Conjunction is commutative, so pairs are ordered to share memo entries.
+    return (x, y) if x <= y else (y, x)
+
+
+def _cofactors(build: _Build, n: int, rank: int) -> tuple[int, int]:
+    n_rank, hi, lo = build.nodes[n]
+    if n_rank == rank:
+        return hi, lo
+    return n, n
+
+
+def _and(build: _Build, x: int, y: int) -> int:
+    def expand(pair: tuple[int, int]) -> _Expansion:
+        a, b = pair
+        if a == FALSE:
+            return (), lambda: FALSE
+        if a == TRUE or a == b:
+            return (), lambda: b
+        if pair in build.and_memo:
+            return (), lambda: build.and_memo[pair]
+        _spend(build)
+        rank = min(build.nodes[a][0], build.nodes[b][0])
+        a_hi, a_lo = _cofactors(build, a, rank)
+        b_hi, b_lo = _cofactors(build, b, rank)
+
+        def combine(h: int, l: int) -> int:
+            result = build.and_memo[pair] = _node(build, rank, h, l)
+            return result
+
+        return (_ordered(a_hi, b_hi), _ordered(a_lo, b_lo)), combine
+
+    return _rewrite(_ordered(x, y), expand)
+
+
+def _atom_occurrences(condition: Condition) -> list[Condition]:
+    atoms: list[Condition] = []
+    stack = [condition]
+    while stack:
+        c = stack.pop()
+        kind = type(c)
+        if kind is AndP or kind is OrP:
+            stack.extend((c.left, c.right))
+        elif kind is NotP:
+            stack.append(c.cond)
+        elif kind is not TrueP and kind is not FalseP:
+            atoms.append(c)
+    return atoms
+
+
+def _serialize(build: _Build, root: int) -> BasicForm:
+    # Post-order walk, hi before lo: a canonical numbering of a canonical graph.
+    atoms = sorted(build.rank, key=build.rank.__getitem__)
+    refs: dict[int, int] = {FALSE: FALSE, TRUE: TRUE}
+    nodes: list[tuple[Condition, int, int]] = []
+    stack = [root]
+    while stack:
+        n = stack[-1]
+        if n in refs:
+            stack.pop()
+            continue
+        rank, hi, lo = build.nodes[n]
+        pending = [child for child in (lo, hi) if child not in refs]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        refs[n] = 2 + len(nodes)
+        nodes.append((atoms[rank], refs[hi], refs[lo]))
+    return refs[root], tuple(nodes)
+
+
+@lru_cache(maxsize=_BF_CACHE_SIZE)
+def bf(condition: Condition) -> Optional[BasicForm]:
+    # None when the graph outgrows the build budget.
+    atoms = sorted(set(_atom_occurrences(condition)), key=_condition_sort_key)
+    rank = {atom: i for i, atom in enumerate(atoms)}
+    terminal = len(rank)
+    build = _Build(rank=rank, nodes=[(terminal, FALSE, FALSE), (terminal, TRUE, TRUE)])
+
+    def atom(c: Condition) -> _Expansion:
+        return (), lambda: _node(build, rank[c], TRUE, FALSE)
+
+    def either(x: int, y: int) -> int:
+        return _not(build, _and(build, _not(build, x), _not(build, y)))
+
+    expansions: dict[type, Callable[[Condition], _Expansion]] = {
+        TrueP: lambda c: ((), lambda: TRUE),
+        FalseP: lambda c: ((), lambda: FALSE),
+        NotP: lambda c: ((c.cond,), lambda x: _not(build, x)),
+        AndP: lambda c: ((c.left, c.right), lambda x, y: _and(build, x, y)),
+        OrP: lambda c: ((c.left, c.right), either),
+    }
+    try:
+        root = _rewrite(condition, lambda c: expansions.get(type(c), atom)(c))
+    except _BudgetExceeded:
+        return None
+    return _serialize(build, root)
+
+
+@lru_cache(maxsize=_BF_CACHE_SIZE)
+def compile_bf(condition: Condition) -> Optional[Predicate]:
+    # Evaluation walks one root-to-leaf path, so each atom is tested at most once, cheapest
+    # first. Only worth it when some atom occurs more than once, since the generated expression
+    # would test it again; None otherwise, or when the basic form outgrows its budget.
+    occurrences = _atom_occurrences(condition)
+    if len(set(occurrences)) == len(occurrences):
+        return None
+    form = bf(condition)
+    if form is None:
+        return None
+    root, nodes = form
+    tests = tuple((compile_condition(atom), hi, lo) for atom, hi, lo in nodes)
+
+    def predicate(ctx: Context) -> bool:
+        ref = root
+        while ref > TRUE:
+            test, hi, lo = tests[ref - 2]
+            ref = hi if test(ctx) else lo
+        return ref == TRUE
+
+    return predicate
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 
-from .algebra import activate, execute, update_stats
+from .algebra import activate, execute, prioritize, update_stats
 from .semantics import andP, hasText, inApp
 from .store import default_policy, empty_store, insert_hook
 from .types import (
@@ -32,9 +32,9 @@ from .types import (
 def example_context(current_time: datetime) -> Context:
     return Context(
         features={
-            Feature("current_text", "text"): TextValue("Schedule a meeting for tomorrow"),
-            Feature("window_title", "ui"): TextValue("Email - Inbox"),
-            Feature("cursor_position", "ui"): NumericValue(42),
+            Feature.get("current_text", "text"): TextValue("Schedule a meeting for tomorrow"),
+            Feature.get("window_title", "ui"): TextValue("Email - Inbox"),
+            Feature.get("cursor_position", "ui"): NumericValue(42),
         },
         time=current_time,
         app="email",
@@ -93,7 +93,7 @@ def example_learned_hook(current_time: datetime) -> Hook:
 def example_delta_scenario(current_time: datetime) -> tuple[Snapshot, Snapshot, UserInput]:
     before_ctx = example_context(current_time)
     after_ctx = Context(
-        features={**before_ctx.features, Feature("new_event", "ui"): TextValue("Meeting with Bob")},
+        features={**before_ctx.features, Feature.get("new_event", "ui"): TextValue("Meeting with Bob")},
         time=before_ctx.time,
         app="calendar",
     )
@@ -139,7 +139,7 @@ def example_cascading_pair(current_time: datetime) -> tuple[Hook, Hook, Context]
         hook_specificity=0.6,
     )
     ctx = Context(
-        features={Feature("user_intent", "text"): TextValue("send email to client")},
+        features={Feature.get("user_intent", "text"): TextValue("send email to client")},
         time=current_time,
         app="email",
     )
@@ -206,9 +206,9 @@ def demonstrate_workflow(current_time: datetime) -> tuple[int, str | None, float
     store = create_sample_store(current_time)
     ctx = example_context(current_time)
     matches = activate(store, ctx)
-    if not matches:
+    chosen = prioritize(default_policy(), matches)
+    if chosen is None:
         return 0, None, None
-    chosen = min(matches, key=lambda m: (m.match_cost, -m.match_hook.hook_stats.stats_success))
     outcome = execute(chosen.match_hook, ctx)
     updated = update_stats(0.1, chosen.match_hook, outcome.outcome_correction)
     return len(matches), chosen.match_hook.hook_id, updated.hook_stats.stats_success
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 
 from .types import (
     Action,
@@ -30,8 +31,14 @@ from .types import (
 
 
 def context_has_text(text: str, ctx: Context) -> bool:
-    for value in ctx.features.values():
-        if isinstance(value, TextValue) and text in value.value:
+    blob = ctx.text_blob
+    if blob is None:
+        return False
+    if text and "\x00" not in text:
+        return text in blob
+    # Empty or NUL-bearing needles could match across the separator, so check value by value.
+    for value in ctx.text_values:
+        if text in value:
             return True
     return False
 
@@ -44,36 +51,147 @@ def context_feature(feature: Feature, ctx: Context) -> Optional[FeatureValue]:
     return ctx.features.get(feature)
 
 
+_EVAL_ATOM: dict[type, Callable[[Condition, Context], bool]] = {
+    TrueP: lambda c, ctx: True,
+    FalseP: lambda c, ctx: False,
+    HasText: lambda c, ctx: context_has_text(c.text, ctx),
+    InApp: lambda c, ctx: ctx.app == c.app,
+    TimeAfter: lambda c, ctx: ctx.time > c.time,
+    TimeBefore: lambda c, ctx: ctx.time < c.time,
+    FeatureEq: lambda c, ctx: ctx.features.get(c.feature) == c.value,
+}
+
+
 def eval_condition(condition: Condition, ctx: Context) -> bool:
-    if isinstance(condition, TrueP):
-        return True
-    if isinstance(condition, FalseP):
-        return False
-    if isinstance(condition, HasText):
-        return context_has_text(condition.text, ctx)
-    if isinstance(condition, InApp):
-        return context_in_app(condition.app, ctx)
-    if isinstance(condition, TimeAfter):
-        return ctx.time > condition.time
-    if isinstance(condition, TimeBefore):
-        return ctx.time < condition.time
-    if isinstance(condition, FeatureEq):
-        return context_feature(condition.feature, ctx) == condition.value
-    if isinstance(condition, AndP):
-        return eval_condition(condition.left, ctx) and eval_condition(condition.right, ctx)
-    if isinstance(condition, OrP):
-        return eval_condition(condition.left, ctx) or eval_condition(condition.right, ctx)
-    if isinstance(condition, NotP):
-        return not eval_condition(condition.cond, ctx)
+    # Iterative walk: each stack entry is a pending AndP/OrP/NotP and whether its right
+    # operand is already being evaluated. Right operands are only visited when the left
+    # one does not decide the result, exactly like Python's `and`/`or`.
+    stack: list[tuple[Condition, bool]] = []
+    node = condition
+    while True:
+        kind = type(node)
+        while kind is AndP or kind is OrP or kind is NotP:
+            stack.append((node, False))
+            node = node.cond if kind is NotP else node.left
+            kind = type(node)
+        try:
+            atom = _EVAL_ATOM[kind]
+        except KeyError:
+            raise TypeError(f"Unsupported condition: {node!r}") from None
+        value = atom(node, ctx)
+        while stack:
+            parent, on_right = stack.pop()
+            kind = type(parent)
+            if kind is NotP:
+                value = not value
+            elif on_right or value == (kind is OrP):
+                # Either the right operand's value is the result, or the left one short-circuits.
+                continue
+            else:
+                stack.append((parent, True))
+                node = parent.right
+                break
+        else:
+            return value
+
+
+def eval_condition_batch(condition: Condition, contexts: list[Context]) -> list[bool]:
+    # One condition over many contexts: every node becomes a bitmask with bit i set when it
+    # holds on contexts[i]. Each distinct atom is evaluated once per context, and AND/OR/NOT
+    # combine whole masks with C-level int operations instead of per-context branching.
+    if not contexts:
+        return []
+    full = (1 << len(contexts)) - 1
+
+    def atom_mask(c: Condition) -> int:
+        try:
+            atom = _EVAL_ATOM[type(c)]
+        except KeyError:
+            raise TypeError(f"Unsupported condition: {c!r}") from None
+        return int("".join("1" if atom(c, ctx) else "0" for ctx in reversed(contexts)), 2)
+
+    def expand(c: Condition) -> _Expansion:
+        kind = type(c)
+        if kind is AndP:
+            return (c.left, c.right), lambda left, right: left & right
+        if kind is OrP:
+            return (c.left, c.right), lambda left, right: left | right
+        if kind is NotP:
+            return (c.cond,), lambda mask: full ^ mask
+        return (), lambda: atom_mask(c)
+
+    bits = format(_rewrite(condition, expand), f"0{len(contexts)}b")
+    return [bit == "1" for bit in reversed(bits)]
+
+
+Predicate = Callable[[Context], bool]
+
+
+# A chain of one connective becomes one flat `a and b and c` expression, so the source only
+# nests where connectives alternate. Deeper alternation falls back to the iterative
+# evaluator rather than risk the parser's nesting limit.
+_CODEGEN_MAX_DEPTH = 32
+
+
+def _condition_source(condition: Condition, consts: dict[str, object], depth: int = 0) -> str | None:
+    if depth > _CODEGEN_MAX_DEPTH:
+        return None
+
+    def const(value: object) -> str:
+        name = f"_c{len(consts)}"
+        consts[name] = value
+        return name
+
+    kind = type(condition)
+    if kind is TrueP:
+        return "True"
+    if kind is FalseP:
+        return "False"
+    if kind is HasText:
+        return f"_has_text({const(condition.text)}, ctx)"
+    if kind is InApp:
+        return f"ctx.app == {const(condition.app)}"
+    if kind is TimeAfter:
+        return f"ctx.time > {const(condition.time)}"
+    if kind is TimeBefore:
+        return f"ctx.time < {const(condition.time)}"
+    if kind is FeatureEq:
+        return f"ctx.features.get({const(condition.feature)}) == {const(condition.value)}"
+    if kind is NotP:
+        inner = _condition_source(condition.cond, consts, depth + 1)
+        return None if inner is None else f"(not {inner})"
+    if kind is AndP or kind is OrP:
+        terms = []
+        for term in _flatten_ands(condition) if kind is AndP else _flatten_ors(condition):
+            source = _condition_source(term, consts, depth + 1)
+            if source is None:
+                return None
+            terms.append(source)
+        joiner = " and " if kind is AndP else " or "
+        return f"({joiner.join(terms)})"
     raise TypeError(f"Unsupported condition: {condition!r}")
 
 
+@lru_cache(maxsize=4096)
+def compile_condition(condition: Condition) -> Predicate:
+    # Same semantics as eval_condition, with the AST walk paid once up front: the whole
+    # condition becomes one generated boolean expression, literals bound as globals.
+    consts: dict[str, object] = {"_has_text": context_has_text}
+    source = _condition_source(condition, consts)
+    if source is None:
+        return lambda ctx: eval_condition(condition, ctx)
+    namespace: dict[str, object] = {}
+    exec(compile(f"def predicate(ctx):\n    return {source}\n", "<condition>", "exec"), consts, namespace)
+    return namespace["predicate"]
+
+
 def eval_action(action: Action, _ctx: Context) -> OutcomePlan:
     return action.action_plan
 
 
 def eval_hook(hook: Hook, ctx: Context) -> Optional[OutcomePlan]:
-    if eval_condition(hook.hook_condition, ctx):
+    # The predicate is compiled once per hook, so repeated evaluation skips the tree walk.
+    if hook.hook_predicate(ctx):
         return eval_action(hook.hook_action, ctx)
     return None
 
@@ -112,151 +230,377 @@ def notP(c: Condition) -> Condition:
     return NotP(c)
 
 
+# Flyweight pool: structurally equal atoms built here are one object, so index lookups
+# and tuple comparisons take the identity fast path. Bounded; the oldest entry goes first.
+_ATOM_POOL: dict[tuple, Condition] = {}
+
+_ATOM_FIELDS: dict[type, tuple[str, ...]] = {
+    HasText: ("text",),
+    InApp: ("app",),
+    TimeAfter: ("time",),
+    TimeBefore: ("time",),
+    FeatureEq: ("feature", "value"),
+}
+
+
+def _intern(cls: type, *args) -> Condition:
+    key = (cls, args)
+    atom = _ATOM_POOL.get(key)
+    if atom is None:
+        atom = cls(*args)
+        if len(_ATOM_POOL) >= _NORMALIZE_CACHE_SIZE:
+            _ATOM_POOL.pop(next(iter(_ATOM_POOL)), None)
+        _ATOM_POOL[key] = atom
+    return atom
+
+
+def _intern_atom(c: Condition) -> Condition:
+    names = _ATOM_FIELDS.get(type(c))
+    if names is None:
+        return c
+    return _intern(type(c), *(getattr(c, name) for name in names))
+
+
 def hasText(text: str) -> Condition:
-    return HasText(text)
+    return _intern(HasText, text)
 
 
 def inApp(app: str) -> Condition:
-    return InApp(app)
+    return _intern(InApp, app)
 
 
 def timeAfter(t) -> Condition:
-    return TimeAfter(t)
+    return _intern(TimeAfter, t)
 
 
 def timeBefore(t) -> Condition:
-    return TimeBefore(t)
+    return _intern(TimeBefore, t)
 
 
 def featureEq(feature: Feature, value: FeatureValue) -> Condition:
-    return FeatureEq(feature, value)
+    return _intern(FeatureEq, feature, value)
 
 
+# Conditions are frozen and hashable, so normalization and each of its passes are pure
+# functions of a hashable key; shared subtrees are normalized once.
+_NORMALIZE_CACHE_SIZE = 65536
+
+# A rewrite step: the subterms to rewrite first, and how to combine their results.
+_Expansion = tuple[tuple[Condition, ...], Callable[..., Condition]]
+
+
+def _rewrite(root: Condition, expand: Callable[[Condition], _Expansion]) -> Condition:
+    # Iterative post-order rewrite, so deep conditions cannot hit the recursion limit.
+    # Results are memoized per node for the duration of the call.
+    results: dict[Condition, Condition] = {}
+    stack: list[tuple[Condition, _Expansion | None]] = [(root, None)]
+    while stack:
+        node, expansion = stack.pop()
+        if expansion is None:
+            if node in results:
+                continue
+            expansion = expand(node)
+            pending = [child for child in expansion[0] if child not in results]
+            if pending:
+                stack.append((node, expansion))
+                stack.extend((child, None) for child in pending)
+                continue
+        children, combine = expansion
+        results[node] = combine(*(results[child] for child in children))
+    return results[root]
+
+
+def _leaf(c: Condition) -> _Expansion:
+    return (), lambda: c
+
+
+# How NotP(inner) is pushed inward, keyed on the type of inner; other negations are atoms.
+_NEGATE: dict[type, Callable[[Condition], _Expansion]] = {
+    NotP: lambda inner: ((inner.cond,), lambda x: x),
+    AndP: lambda inner: ((NotP(inner.left), NotP(inner.right)), OrP),
+    OrP: lambda inner: ((NotP(inner.left), NotP(inner.right)), AndP),
+    TrueP: lambda inner: ((), FalseP),
+    FalseP: lambda inner: ((), TrueP),
+}
+
+_EXPAND_NEGATIONS: dict[type, Callable[[Condition], _Expansion]] = {
+    NotP: lambda c: _NEGATE[type(c.cond)](c.cond) if type(c.cond) in _NEGATE else _leaf(c),
+    AndP: lambda c: ((c.left, c.right), AndP),
+    OrP: lambda c: ((c.left, c.right), OrP),
+}
+
+
+def _expand_negations(c: Condition) -> _Expansion:
+    return _EXPAND_NEGATIONS.get(type(c), _leaf)(c)
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
 def _push_negations(c: Condition) -> Condition:
-    if isinstance(c, NotP) and isinstance(c.cond, NotP):
-        return _push_negations(c.cond.cond)
-    if isinstance(c, NotP) and isinstance(c.cond, AndP):
-        return OrP(_push_negations(NotP(c.cond.left)), _push_negations(NotP(c.cond.right)))
-    if isinstance(c, NotP) and isinstance(c.cond, OrP):
-        return AndP(_push_negations(NotP(c.cond.left)), _push_negations(NotP(c.cond.right)))
-    if isinstance(c, NotP) and isinstance(c.cond, TrueP):
+    return _rewrite(c, _expand_negations)
+
+
+def _and_identities(left: Condition, right: Condition) -> Condition:
+    if isinstance(left, TrueP):
+        return right
+    if isinstance(right, TrueP):
+        return left
+    if isinstance(left, FalseP) or isinstance(right, FalseP):
         return FalseP()
-    if isinstance(c, NotP) and isinstance(c.cond, FalseP):
+    return AndP(left, right)
+
+
+def _or_identities(left: Condition, right: Condition) -> Condition:
+    if isinstance(left, FalseP):
+        return right
+    if isinstance(right, FalseP):
+        return left
+    if isinstance(left, TrueP) or isinstance(right, TrueP):
         return TrueP()
-    if isinstance(c, AndP):
-        return AndP(_push_negations(c.left), _push_negations(c.right))
-    if isinstance(c, OrP):
-        return OrP(_push_negations(c.left), _push_negations(c.right))
-    return c
+    return OrP(left, right)
+
+
+_EXPAND_IDENTITIES: dict[type, Callable[[Condition], _Expansion]] = {
+    AndP: lambda c: ((c.left, c.right), _and_identities),
+    OrP: lambda c: ((c.left, c.right), _or_identities),
+}
+
 
+def _expand_identities(c: Condition) -> _Expansion:
+    return _EXPAND_IDENTITIES.get(type(c), _leaf)(c)
 
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
 def _eliminate_identities(c: Condition) -> Condition:
-    if isinstance(c, AndP):
-        left = _eliminate_identities(c.left)
-        right = _eliminate_identities(c.right)
-        if isinstance(left, TrueP):
-            return right
-        if isinstance(right, TrueP):
-            return left
-        if isinstance(left, FalseP) or isinstance(right, FalseP):
-            return FalseP()
-        return AndP(left, right)
-    if isinstance(c, OrP):
-        left = _eliminate_identities(c.left)
-        right = _eliminate_identities(c.right)
-        if isinstance(left, FalseP):
-            return right
-        if isinstance(right, FalseP):
-            return left
-        if isinstance(left, TrueP) or isinstance(right, TrueP):
-            return TrueP()
-        return OrP(left, right)
-    return c
+    return _rewrite(c, _expand_identities)
 
 
 def _flatten_ands(c: Condition) -> list[Condition]:
-    if isinstance(c, AndP):
-        return _flatten_ands(c.left) + _flatten_ands(c.right)
-    return [c]
+    # Left-to-right conjuncts in one pass: the right child is pushed first so the left pops first.
+    out: list[Condition] = []
+    stack = [c]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, AndP):
+            stack.append(x.right)
+            stack.append(x.left)
+        else:
+            out.append(x)
+    return out
 
 
 def _flatten_ors(c: Condition) -> list[Condition]:
-    if isinstance(c, OrP):
-        return _flatten_ors(c.left) + _flatten_ors(c.right)
-    return [c]
+    out: list[Condition] = []
+    stack = [c]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, OrP):
+            stack.append(x.right)
+            stack.append(x.left)
+        else:
+            out.append(x)
+    return out
+
+
+def _build_balanced(cs: list[Condition], connective: type) -> Condition:
+    # Halving keeps the tree log2(N) deep while its leaves stay in left-to-right order.
+    def build(lo: int, hi: int) -> Condition:
+        if hi - lo == 1:
+            return cs[lo]
+        mid = (lo + hi) // 2
+        return connective(build(lo, mid), build(mid, hi))
+
+    return build(0, len(cs))
 
 
 def _build_and(cs: list[Condition]) -> Condition:
     if not cs:
         return TrueP()
-    out = cs[0]
-    for c in cs[1:]:
-        out = AndP(out, c)
-    return out
+    return _build_balanced(cs, AndP)
 
 
 def _build_or(cs: list[Condition]) -> Condition:
     if not cs:
         return FalseP()
-    out = cs[0]
-    for c in cs[1:]:
-        out = OrP(out, c)
-    return out
+    return _build_balanced(cs, OrP)
 
 
-def _flatten_condition(c: Condition) -> Condition:
-    if isinstance(c, AndP):
-        flat = [_flatten_condition(x) for x in _flatten_ands(_flatten_condition(c.left)) + _flatten_ands(_flatten_condition(c.right))]
-        return _build_and(flat)
-    if isinstance(c, OrP):
-        flat = [_flatten_condition(x) for x in _flatten_ors(_flatten_condition(c.left)) + _flatten_ors(_flatten_condition(c.right))]
-        return _build_or(flat)
-    if isinstance(c, NotP):
-        return NotP(_flatten_condition(c.cond))
-    return c
+# A whole AND/OR chain expands to its terms at once; rewriting a term never yields
+# the chain's own connective, so the results need no further flattening.
+_EXPAND_FLATTEN: dict[type, Callable[[Condition], _Expansion]] = {
+    AndP: lambda c: (tuple(_flatten_ands(c)), lambda *terms: _build_and(list(terms))),
+    OrP: lambda c: (tuple(_flatten_ors(c)), lambda *terms: _build_or(list(terms))),
+    NotP: lambda c: ((c.cond,), NotP),
+}
 
 
-def _condition_priority(c: Condition) -> int:
-    if isinstance(c, TrueP):
-        return 0
-    if isinstance(c, FalseP):
-        return 1
-    if isinstance(c, HasText):
-        return 2
-    if isinstance(c, InApp):
-        return 3
-    if isinstance(c, TimeAfter):
-        return 4
-    if isinstance(c, TimeBefore):
-        return 5
-    if isinstance(c, FeatureEq):
-        return 6
-    if isinstance(c, NotP):
-        return 7
-    if isinstance(c, AndP):
-        return 8
-    if isinstance(c, OrP):
-        return 9
-    return 99
+def _expand_flatten(c: Condition) -> _Expansion:
+    return _EXPAND_FLATTEN.get(type(c), _leaf)(c)
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _flatten_condition(c: Condition) -> Condition:
+    return _rewrite(c, _expand_flatten)
 
 
-def _condition_sort_key(c: Condition) -> tuple[int, str]:
-    return (_condition_priority(c), repr(c))
+_PRIORITY: dict[type, int] = {
+    TrueP: 0,
+    FalseP: 1,
+    HasText: 2,
+    InApp: 3,
+    TimeAfter: 4,
+    TimeBefore: 5,
+    FeatureEq: 6,
+    NotP: 7,
+    AndP: 8,
+    OrP: 9,
+}
 
 
+def _condition_priority(c: Condition) -> int:
+    return _PRIORITY.get(type(c), 99)
+
+
+# Rough relative evaluation cost of each atom: a substring scan over every text feature
+# costs far more than a single equality test.
+_ATOM_COST: dict[type, int] = {
+    TrueP: 0,
+    FalseP: 0,
+    InApp: 1,
+    FeatureEq: 2,
+    TimeAfter: 2,
+    TimeBefore: 2,
+    HasText: 10,
+}
+
+_EXPAND_COST: dict[type, Callable[[Condition], _Expansion]] = {
+    NotP: lambda c: ((c.cond,), lambda cost: cost + 1),
+    AndP: lambda c: ((c.left, c.right), lambda left, right: left + right),
+    OrP: lambda c: ((c.left, c.right), lambda left, right: left + right),
+}
+
+
+def _expand_cost(c: Condition) -> _Expansion:
+    expand = _EXPAND_COST.get(type(c))
+    if expand is None:
+        return (), lambda: _ATOM_COST.get(type(c), 10)
+    return expand(c)
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _condition_cost(c: Condition) -> int:
+    return _rewrite(c, _expand_cost)
+
+
+_EXPAND_STRUCTURE: dict[type, Callable[[Condition], _Expansion]] = {
+    NotP: lambda c: ((c.cond,), lambda key: (_PRIORITY[NotP], key)),
+    AndP: lambda c: ((c.left, c.right), lambda left, right: (_PRIORITY[AndP], left, right)),
+    OrP: lambda c: ((c.left, c.right), lambda left, right: (_PRIORITY[OrP], left, right)),
+}
+
+
+def _expand_structure(c: Condition) -> _Expansion:
+    expand = _EXPAND_STRUCTURE.get(type(c))
+    if expand is None:
+        # An atom's repr is short and computed once per atom; composites reuse their children's keys.
+        return (), lambda: (_condition_priority(c), repr(c))
+    return expand(c)
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _structural_key(c: Condition) -> tuple:
+    # Nested tuples mirroring the tree: deterministic across processes, unlike hash(c).
+    return _rewrite(c, _expand_structure)
+
+
+def _condition_sort_key(c: Condition) -> tuple[int, tuple]:
+    # Cheapest operands first in both AND and OR chains, so short-circuiting skips the
+    # expensive ones; the structural key breaks ties so the order stays canonical.
+    return (_condition_cost(c), _structural_key(c))
+
+
+def _absorb_terms(terms: tuple[Condition, ...], chain: type, dual: type) -> list[Condition]:
+    # Idempotence (a & a = a), complement (a & ~a = F) and absorption (a & (a | b) = a) over
+    # one AND chain, or dually one OR chain. Terms are already normalized, but one may have
+    # collapsed to a constant or to a chain of the same connective, so flatten them again.
+    flatten, flatten_dual = (_flatten_ands, _flatten_ors) if chain is AndP else (_flatten_ors, _flatten_ands)
+    unit, zero = (TrueP, FalseP) if chain is AndP else (FalseP, TrueP)
+    seen: dict[Condition, None] = {}
+    for term in terms:
+        for t in flatten(term):
+            if type(t) is zero:
+                return [zero()]
+            if type(t) is not unit:
+                seen.setdefault(t, None)
+    # Negations sit on atoms only, so complements are a NotP next to its operand.
+    if any(type(t) is NotP and t.cond in seen for t in seen):
+        return [zero()]
+
+    duals = {t: frozenset(flatten_dual(t)) for t in seen if type(t) is dual}
+
+    def covers(parts: frozenset[Condition], other: frozenset[Condition]) -> bool:
+        # Every alternative in other is one of parts or contains one of them, so the
+        # dual term with parts is implied by (dually, implies) the one with other:
+        # (a | b) & (a | b | c), and (a | b) & (a | (b & c)) after b absorbed part of it.
+        return all(x in parts or (type(x) is chain and any(y in parts for y in flatten(x))) for x in other)
+
+    def absorbed(t: Condition) -> bool:
+        # a & (a | b): some alternative of t is made of terms the chain already has, or
+        # another dual term of the chain covers t without t covering it back.
+        parts = duals[t]
+        return any(all(x in seen for x in flatten(d)) for d in parts) or any(
+            covers(parts, other) and not covers(duals[o], parts)
+            for o, other in duals.items()
+            if o is not t
+        )
+
+    return [t for t in seen if t not in duals or not absorbed(t)]
+
+
+_EXPAND_SORT: dict[type, Callable[[Condition], _Expansion]] = {
+    AndP: lambda c: (
+        tuple(_flatten_ands(c)),
+        lambda *terms: _build_and(sorted(_absorb_terms(terms, AndP, OrP), key=_condition_sort_key)),
+    ),
+    OrP: lambda c: (
+        tuple(_flatten_ors(c)),
+        lambda *terms: _build_or(sorted(_absorb_terms(terms, OrP, AndP), key=_condition_sort_key)),
+    ),
+    NotP: lambda c: ((c.cond,), NotP),
+}
+
+
+def _expand_sort(c: Condition) -> _Expansion:
+    expand = _EXPAND_SORT.get(type(c))
+    if expand is None:
+        # Last pass, so normal forms share pooled atoms; composites are shared by the memo.
+        return (), lambda: _intern_atom(c)
+    return expand(c)
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
 def _sort_condition(c: Condition) -> Condition:
-    if isinstance(c, AndP):
-        terms = _flatten_ands(AndP(_sort_condition(c.left), _sort_condition(c.right)))
-        terms = sorted(terms, key=_condition_sort_key)
-        return _build_and(terms)
-    if isinstance(c, OrP):
-        terms = _flatten_ors(OrP(_sort_condition(c.left), _sort_condition(c.right)))
-        terms = sorted(terms, key=_condition_sort_key)
-        return _build_or(terms)
-    if isinstance(c, NotP):
-        return NotP(_sort_condition(c.cond))
-    return c
+    return _rewrite(c, _expand_sort)
 
 
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
 def normalize_condition(condition: Condition) -> Condition:
     return _sort_condition(_flatten_condition(_eliminate_identities(_push_negations(condition))))
+
+
+def optimize_condition(condition: Condition, contexts: list[Context]) -> Condition:
+    # Profile-guided reordering: inside every conjunction, the conjuncts that held least
+    # often on the sample contexts go first so evaluation rejects early. The sort is
+    # stable and the result is logically (and after normalization, structurally) equal.
+    if isinstance(condition, AndP):
+        terms = [optimize_condition(t, contexts) for t in _flatten_ands(condition)]
+
+        def hits(term: Condition) -> int:
+            predicate = compile_condition(term)
+            return sum(1 for ctx in contexts if predicate(ctx))
+
+        return _build_and(sorted(terms, key=hits))
+    if isinstance(condition, OrP):
+        return OrP(optimize_condition(condition.left, contexts), optimize_condition(condition.right, contexts))
+    if isinstance(condition, NotP):
+        return NotP(optimize_condition(condition.cond, contexts))
+    return condition
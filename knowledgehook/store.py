@@ -1,7 +1,29 @@
 from __future__ import annotations
 
-from .semantics import normalize_condition
-from .types import Alpha, Condition, Context, Cost, Hook, HookId, HookStore, Policy, Score, Specificity
+from collections.abc import Iterable
+from itertools import islice
+
+from dataclasses import dataclass, field, replace
+
+from .basicform import BasicForm, bf
+from .semantics import _flatten_ands, normalize_condition, optimize_condition
+from .types import (
+    Alpha,
+    AndP,
+    Condition,
+    Context,
+    Cost,
+    FalseP,
+    FeatureEq,
+    Hook,
+    HookId,
+    HookStore,
+    InApp,
+    Policy,
+    Score,
+    Specificity,
+    TrueP,
+)
 
 
 def default_policy() -> Policy:
@@ -9,20 +31,81 @@ def default_policy() -> Policy:
 
 
 def empty_store() -> HookStore:
-    return HookStore(hooks={}, indices={})
+    return HookStore(hooks={}, indices={}, activation_index={})
 
 
-def condition_key(condition: Condition) -> str:
-    return repr(normalize_condition(condition))
+def condition_key(condition: Condition) -> BasicForm | Condition:
+    # The basic form, so conditions equal under the boolean identities share a bucket;
+    # conditions whose basic form outgrows its budget fall back to their normal form.
+    key = bf(condition)
+    return normalize_condition(condition) if key is None else key
+
+
+def activation_anchor(hook: Hook) -> Condition | None:
+    # An atom every satisfying context must contain: InApp(app) or FeatureEq(feature, value).
+    # TrueP() means the hook has no anchor and is always checked; None means it can never fire.
+    normalized = hook.hook_normalized_condition
+    if isinstance(normalized, FalseP):
+        return None
+    terms = _flatten_ands(normalized) if isinstance(normalized, AndP) else [normalized]
+    for kind in (InApp, FeatureEq):
+        for term in terms:
+            if isinstance(term, kind):
+                return term
+    return TrueP()
 
 
 def insert_hook(hook: Hook, store: HookStore) -> HookStore:
     hooks = dict(store.hooks)
     hooks[hook.hook_id] = hook
-    indices = {k: list(v) for k, v in store.indices.items()}
+    # Buckets are immutable tuples, so only the top-level dicts need copying.
+    indices = dict(store.indices)
     key = condition_key(hook.hook_condition)
-    indices.setdefault(key, []).append(hook.hook_id)
-    return HookStore(hooks=hooks, indices=indices)
+    indices[key] = indices.get(key, ()) + (hook.hook_id,)
+    activation_index = dict(store.activation_index)
+    anchor = activation_anchor(hook)
+    if anchor is not None:
+        activation_index[anchor] = activation_index.get(anchor, ()) + (hook.hook_id,)
+    return HookStore(hooks=hooks, indices=indices, activation_index=activation_index)
+
+
+@dataclass(slots=True)
+class HookStoreBuilder:
+    # Mutable staging area for many inserts: each add is O(1), and freeze copies once.
+    hooks: dict[HookId, Hook] = field(default_factory=dict)
+    indices: dict[BasicForm | Condition, list[HookId]] = field(default_factory=dict)
+    activation_index: dict[Condition, list[HookId]] = field(default_factory=dict)
+
+    @classmethod
+    def from_store(cls, store: HookStore) -> "HookStoreBuilder":
+        return cls(
+            hooks=dict(store.hooks),
+            indices={k: list(v) for k, v in store.indices.items()},
+            activation_index={k: list(v) for k, v in store.activation_index.items()},
+        )
+
+    def add(self, hook: Hook) -> None:
+        # Same effect as insert_hook, applied in place.
+        self.hooks[hook.hook_id] = hook
+        self.indices.setdefault(condition_key(hook.hook_condition), []).append(hook.hook_id)
+        anchor = activation_anchor(hook)
+        if anchor is not None:
+            self.activation_index.setdefault(anchor, []).append(hook.hook_id)
+
+    def freeze(self) -> HookStore:
+        return HookStore(
+            hooks=dict(self.hooks),
+            indices={k: tuple(v) for k, v in self.indices.items()},
+            activation_index={k: tuple(v) for k, v in self.activation_index.items()},
+        )
+
+
+def bulk_insert(hooks: Iterable[Hook], store: HookStore) -> HookStore:
+    # Same result as folding insert_hook over hooks, with one copy instead of one per hook.
+    builder = HookStoreBuilder.from_store(store)
+    for hook in hooks:
+        builder.add(hook)
+    return builder.freeze()
 
 
 def lookup_hook(hook_id: HookId, store: HookStore) -> Hook | None:
@@ -32,14 +115,41 @@ def lookup_hook(hook_id: HookId, store: HookStore) -> Hook | None:
 def delete_hook(hook_id: HookId, store: HookStore) -> HookStore:
     hooks = dict(store.hooks)
     hooks.pop(hook_id, None)
-    # Matches Haskell TODO semantics: do not clean indices.
-    return HookStore(hooks=hooks, indices={k: list(v) for k, v in store.indices.items()})
+    # Matches Haskell TODO semantics: do not clean indices. No store mutates its index
+    # dicts or their tuple buckets, so they are shared rather than copied.
+    return HookStore(hooks=hooks, indices=store.indices, activation_index=store.activation_index)
 
 
 def update_hook(hook: Hook, store: HookStore) -> HookStore:
     return insert_hook(hook, delete_hook(hook.hook_id, store))
 
 
+def store_evict(n: int, store: HookStore) -> HookStore:
+    # store.hooks keeps insertion order and update_hook re-inserts, so the first n
+    # hooks are the least recently written ones.
+    if n <= 0:
+        return store
+    evicted = set(islice(store.hooks, n))
+    # Unlike delete_hook, rebuild the indices so evicted and stale ids do not linger.
+    builder = HookStoreBuilder()
+    for hook_id, hook in store.hooks.items():
+        if hook_id not in evicted:
+            builder.add(hook)
+    return builder.freeze()
+
+
+def optimize_store(contexts: list[Context], store: HookStore) -> HookStore:
+    # Reordering conjuncts leaves every condition key and anchor unchanged,
+    # so both indices carry over as-is.
+    hooks = {
+        hook_id: replace(
+            hook, hook_condition=optimize_condition(hook.hook_condition, contexts), hook_profiled=True
+        )
+        for hook_id, hook in store.hooks.items()
+    }
+    return HookStore(hooks=hooks, indices=store.indices, activation_index=store.activation_index)
+
+
 def mk_alpha(x: float) -> Alpha | None:
     if 0.0 < x < 1.0:
         return x
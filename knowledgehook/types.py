@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from collections.abc import Hashable, Mapping
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from enum import Enum
-from typing import Optional, Union
+from functools import cache
+from types import MappingProxyType
+from typing import Callable, Optional, Union
 
 
 HookId = str
@@ -14,33 +17,57 @@ Specificity = float
 Correction = bool
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Feature:
     feature_name: str
     feature_type: str
+    # Features key every context lookup, so the field-tuple hash is computed once.
+    _hash: int = field(init=False, repr=False, compare=False)
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash", hash((self.feature_name, self.feature_type)))
 
-@dataclass(frozen=True)
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        # String hashes are salted per process, so a pickled _hash would go stale on load;
+        # rebuild from the fields instead.
+        return (Feature, (self.feature_name, self.feature_type))
+
+    @classmethod
+    def get(cls, feature_name: str, feature_type: str) -> "Feature":
+        key = (feature_name, feature_type)
+        feature = _FEATURE_POOL.get(key)
+        if feature is None:
+            feature = _FEATURE_POOL.setdefault(key, cls(feature_name, feature_type))
+        return feature
+
+
+_FEATURE_POOL: dict[tuple[str, str], Feature] = {}
+
+
+@dataclass(frozen=True, slots=True)
 class TextValue:
     value: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppValue:
     value: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TimeValue:
     value: datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NumericValue:
     value: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BoolValue:
     value: bool
 
@@ -48,107 +75,211 @@ class BoolValue:
 FeatureValue = Union[TextValue, AppValue, TimeValue, NumericValue, BoolValue]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Context:
-    features: dict[Feature, FeatureValue]
+    features: Mapping[Feature, FeatureValue]
     time: datetime
     app: Optional[str]
-
-
+    # Text feature values split out of features, so text checks skip the other kinds.
+    text_values: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    # Every text feature joined by NUL (None if there are none), so HasText is one substring search.
+    text_blob: Optional[str] = field(init=False, repr=False, compare=False)
+    # Computed once features are frozen, so every copy of the context carries it.
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # A read-only view over a private copy keeps the context immutable, and so hashable.
+        # Always copy: a read-only view passed in may still sit over a dict its owner mutates.
+        object.__setattr__(self, "features", MappingProxyType(dict(self.features)))
+        texts = tuple(value.value for value in self.features.values() if isinstance(value, TextValue))
+        object.__setattr__(self, "text_values", texts)
+        object.__setattr__(self, "text_blob", "\x00".join(texts) if texts else None)
+        object.__setattr__(self, "_hash", hash((frozenset(self.features.items()), self.time, self.app)))
+
+    def __reduce__(self):
+        # mappingproxy cannot be pickled; rebuild from a plain dict, which also recomputes
+        # the derived fields.
+        return (Context, (dict(self.features), self.time, self.app))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+
+@cache
 def empty_context() -> Context:
     return Context(features={}, time=datetime(1970, 1, 1, tzinfo=UTC), app=None)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TrueP:
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FalseP:
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HasText:
     text: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class InApp:
     app: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TimeAfter:
     time: datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TimeBefore:
     time: datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FeatureEq:
     feature: Feature
     value: FeatureValue
 
 
-@dataclass(frozen=True)
+# Composite nodes cache their structural hash: children already hold theirs, so hashing
+# a tree for a memo lookup is O(1) instead of a walk over the whole subtree. Like Feature,
+# they pickle their fields only, so the hash is recomputed under the loading process's seed.
+# Equality is iterative: memo lookups compare equal trees built separately, at any depth.
+def _composite_eq(a: "Condition", b: "Condition") -> bool:
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if x is y:
+            continue
+        kind = type(x)
+        if kind is not type(y):
+            return False
+        if kind is AndP or kind is OrP:
+            if x._hash != y._hash:
+                return False
+            stack.append((x.right, y.right))
+            stack.append((x.left, y.left))
+        elif kind is NotP:
+            if x._hash != y._hash:
+                return False
+            stack.append((x.cond, y.cond))
+        elif x != y:
+            return False
+    return True
+
+
+@dataclass(frozen=True, slots=True)
 class AndP:
     left: "Condition"
     right: "Condition"
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash", hash((AndP, self.left, self.right)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not AndP:
+            return NotImplemented
+        return _composite_eq(self, other)
 
+    def __reduce__(self):
+        return (AndP, (self.left, self.right))
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class OrP:
     left: "Condition"
     right: "Condition"
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash", hash((OrP, self.left, self.right)))
+
+    def __hash__(self) -> int:
+        return self._hash
 
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not OrP:
+            return NotImplemented
+        return _composite_eq(self, other)
 
-@dataclass(frozen=True)
+    def __reduce__(self):
+        return (OrP, (self.left, self.right))
+
+
+@dataclass(frozen=True, slots=True)
 class NotP:
     cond: "Condition"
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash", hash((NotP, self.cond)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not NotP:
+            return NotImplemented
+        return _composite_eq(self, other)
+
+    def __reduce__(self):
+        return (NotP, (self.cond,))
 
 
 Condition = Union[TrueP, FalseP, HasText, InApp, TimeAfter, TimeBefore, FeatureEq, AndP, OrP, NotP]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TypeText:
     text: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ClickElement:
     element: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OpenApp:
     app: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SendKeys:
     keys: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Wait:
     seconds: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Sequence:
     ops: tuple["Op", ...]
 
+    def __post_init__(self) -> None:
+        # Nested sequences are spliced in, so ops never contains a Sequence.
+        if any(type(op) is Sequence for op in self.ops):
+            flat: list[Op] = []
+            for op in self.ops:
+                flat.extend(op.ops if type(op) is Sequence else (op,))
+            object.__setattr__(self, "ops", tuple(flat))
+
 
 Op = Union[TypeText, ClickElement, OpenApp, SendKeys, Wait, Sequence]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RollbackPlan:
     rollback_ops: tuple[Op, ...]
     rollback_context: Context
@@ -157,17 +288,31 @@ class RollbackPlan:
         return RollbackPlan(rollback_ops=other.rollback_ops + self.rollback_ops, rollback_context=self.rollback_context)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OutcomePlan:
     plan_ops: tuple[Op, ...]
     plan_rollback: RollbackPlan
     plan_cost: Cost
 
     def __add__(self, other: "OutcomePlan") -> "OutcomePlan":
+        return OutcomePlan.concat_all([self, other])
+
+    @staticmethod
+    def concat_all(plans: "list[OutcomePlan]") -> "OutcomePlan":
+        # Equal to folding + left to right, but every op tuple is copied once. Costs are
+        # summed in the same order so the float result matches the fold exactly.
+        if not plans:
+            return OutcomePlan.empty()
+        cost = plans[0].plan_cost
+        for plan in plans[1:]:
+            cost = cost + plan.plan_cost
         return OutcomePlan(
-            plan_ops=self.plan_ops + other.plan_ops,
-            plan_rollback=other.plan_rollback + self.plan_rollback,
-            plan_cost=self.plan_cost + other.plan_cost,
+            plan_ops=tuple(op for plan in plans for op in plan.plan_ops),
+            plan_rollback=RollbackPlan(
+                rollback_ops=tuple(op for plan in plans for op in plan.plan_rollback.rollback_ops),
+                rollback_context=plans[-1].plan_rollback.rollback_context,
+            ),
+            plan_cost=cost,
         )
 
     @staticmethod
@@ -175,27 +320,27 @@ class OutcomePlan:
         return OutcomePlan(plan_ops=(), plan_rollback=RollbackPlan(rollback_ops=(), rollback_context=empty_context()), plan_cost=0.0)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Action:
     action_plan: OutcomePlan
     action_description: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Outcome:
     outcome_post: Context
     outcome_correction: Correction
     outcome_plan: OutcomePlan
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Stats:
     stats_success: Score
     stats_uses: int
     stats_corrections: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Metadata:
     meta_created: datetime
     meta_modified: datetime
@@ -203,7 +348,7 @@ class Metadata:
     meta_tags: tuple[str, ...]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Hook:
     hook_id: HookId
     hook_condition: Condition
@@ -211,36 +356,93 @@ class Hook:
     hook_stats: Stats
     hook_meta: Metadata
     hook_specificity: Specificity
+    # Set by optimize_store: the condition's own conjunct order was tuned on sample contexts.
+    hook_profiled: bool = field(default=False, compare=False)
+    hook_normalized_condition: Condition = field(init=False, repr=False, compare=False)
+    hook_predicate: Callable[[Context], bool] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        from .basicform import compile_bf  # basicform and semantics import this module
+        from .semantics import compile_condition, normalize_condition
+
+        normalized = normalize_condition(self.hook_condition)
+        object.__setattr__(self, "hook_normalized_condition", normalized)
+        # Profiled hooks evaluate in their tuned order. The rest go cheapest atom first: through
+        # the basic form when an atom repeats, so each is tested once, else the normal form.
+        if self.hook_profiled:
+            predicate = compile_condition(self.hook_condition)
+        else:
+            predicate = compile_bf(normalized) or compile_condition(normalized)
+        object.__setattr__(self, "hook_predicate", predicate)
+
+    def __reduce__(self):
+        # The compiled predicate is a generated function and cannot be pickled; pickle the
+        # authored fields and let __post_init__ recompute the derived ones (compilation is cached).
+        return (
+            Hook,
+            (
+                self.hook_id,
+                self.hook_condition,
+                self.hook_action,
+                self.hook_stats,
+                self.hook_meta,
+                self.hook_specificity,
+                self.hook_profiled,
+            ),
+        )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HookMatch:
     match_hook: Hook
     match_context: Context
     match_cost: Cost
+    match_sort_key: tuple[Cost, Score] = field(init=False, repr=False, compare=False)
 
+    def __post_init__(self) -> None:
+        # Cheaper first, then more successful: the order prioritize selects by.
+        object.__setattr__(self, "match_sort_key", (self.match_cost, -self.match_hook.hook_stats.stats_success))
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Policy:
     policy_minimize_input: bool
     policy_success_weight: float
     policy_max_cascade_depth: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HookStore:
     hooks: dict[HookId, Hook] = field(default_factory=dict)
-    indices: dict[str, list[HookId]] = field(default_factory=dict)
-
-
-@dataclass(frozen=True)
+    indices: dict[Hashable, tuple[HookId, ...]] = field(default_factory=dict)
+    activation_index: dict[Condition, tuple[HookId, ...]] = field(default_factory=dict)
+    activation_cache: dict[Context, tuple] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Insertion position of each hook, so activate can order just its candidates.
+    hook_positions: dict[HookId, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "hook_positions", {hook_id: i for i, hook_id in enumerate(self.hooks)})
+        # Stores built directly as HookStore(hooks=...) come without an activation index;
+        # build it here so activate still sees every hook.
+        if self.hooks and not self.activation_index:
+            from .store import activation_anchor  # store imports this module
+
+            index: dict[Condition, list[HookId]] = {}
+            for hook in self.hooks.values():
+                anchor = activation_anchor(hook)
+                if anchor is not None:
+                    index.setdefault(anchor, []).append(hook.hook_id)
+            object.__setattr__(self, "activation_index", {k: tuple(v) for k, v in index.items()})
+
+
+@dataclass(frozen=True, slots=True)
 class Snapshot:
     snapshot_context: Context
     snapshot_time: datetime
     snapshot_id: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UserInput:
     input_actions: tuple[Op, ...]
     input_corrections: tuple[str, ...]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import sys
 from pathlib import Path
 
@@ -8,3 +9,16 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+try:
+    from hypothesis import settings
+except ImportError:  # test_properties skips itself without hypothesis
+    settings = None
+
+if settings is not None:
+    # Opt-in quick profile: fewer, deadline-free examples for local iteration. The stock
+    # settings stay the default so CI keeps full coverage.
+    settings.register_profile("fast", max_examples=50, deadline=None)
+    profile = os.environ.get("HYPOTHESIS_PROFILE")
+    if profile:
+        settings.load_profile(profile)
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import copy
+import pickle
 from datetime import UTC, datetime, timedelta
+from functools import reduce
+from types import MappingProxyType
 
 import pytest
 
@@ -8,16 +12,49 @@ hypothesis = pytest.importorskip("hypothesis")
 given = hypothesis.given
 st = hypothesis.strategies
 
+from knowledgehook import semantics
 from knowledgehook.algebra import (
+    activate,
+    activate_best,
+    calculate_specificity,
     cascade,
+    compose_flat,
+    compose_flat_all,
+    compose_nested,
+    compose_nested_all,
     equivalent,
     negative_rl_update,
     prioritize,
+    update_stats,
+    update_stats_batch,
+)
+from knowledgehook.semantics import (
+    andP,
+    compile_condition,
+    context_has_text,
+    eval_condition,
+    eval_condition_batch,
+    featureEq,
+    hasText,
+    inApp,
+    normalize_condition,
+    notP,
+    optimize_condition,
+    orP,
+)
+from knowledgehook.store import (
+    HookStoreBuilder,
+    bulk_insert,
+    condition_key,
+    default_policy,
+    delete_hook,
+    empty_store,
+    insert_hook,
+    store_evict,
 )
-from knowledgehook.semantics import andP, eval_condition, normalize_condition, notP, orP
-from knowledgehook.store import default_policy, empty_store
 from knowledgehook.types import (
     Action,
+    AndP,
     ClickElement,
     Context,
     Equiv,
@@ -27,9 +64,12 @@ from knowledgehook.types import (
     HasText,
     Hook,
     HookMatch,
+    HookStore,
     InApp,
     Metadata,
+    NotP,
     OpenApp,
+    OrP,
     Outcome,
     OutcomePlan,
     RollbackPlan,
@@ -64,11 +104,15 @@ def context_strategy(draw):
 
 @st.composite
 def condition_strategy(draw):
+    # Interned and directly constructed atoms are mixed, so both must behave alike.
     atom = st.one_of(
         st.just(TrueP()),
         st.just(FalseP()),
+        st.text(min_size=1, max_size=10).map(hasText),
         st.text(min_size=1, max_size=10).map(HasText),
+        st.sampled_from(["email", "calendar", "logger"]).map(inApp),
         st.sampled_from(["email", "calendar", "logger"]).map(InApp),
+        st.text(min_size=1, max_size=10).map(lambda t: featureEq(Feature.get("current_text", "text"), TextValue(t))),
         st.text(min_size=1, max_size=10).map(lambda t: FeatureEq(Feature("current_text", "text"), TextValue(t))),
     )
     return draw(
@@ -81,7 +125,7 @@ def condition_strategy(draw):
             ),
             max_leaves=8,
         )
-    ) 
+    )
 
 
 @st.composite
@@ -117,6 +161,19 @@ def hook_strategy(draw):
     )
 
 
+def make_hook(hook_id, condition, profiled=False):
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+    return Hook(
+        hook_id=hook_id,
+        hook_condition=condition,
+        hook_action=Action(action_plan=OutcomePlan.empty(), action_description=hook_id),
+        hook_stats=Stats(stats_success=0.5, stats_uses=0, stats_corrections=0),
+        hook_meta=Metadata(meta_created=now, meta_modified=now, meta_source="test", meta_tags=()),
+        hook_specificity=0.0,
+        hook_profiled=profiled,
+    )
+
+
 @st.composite
 def hook_match_strategy(draw):
     hook = draw(hook_strategy())
@@ -156,7 +213,7 @@ def equivalent_hooks_strategy(draw):
     base = draw(hook_strategy())
     c = base.hook_condition
     eq_condition = andP(c, TrueP())
-    copy = Hook(
+    twin = Hook(
         hook_id=f"{base.hook_id}_equiv",
         hook_condition=eq_condition,
         hook_action=base.hook_action,
@@ -164,7 +221,70 @@ def equivalent_hooks_strategy(draw):
         hook_meta=base.hook_meta,
         hook_specificity=base.hook_specificity,
     )
-    return base, copy
+    return base, twin
+
+
+@given(st.lists(hook_strategy(), max_size=10), context_strategy())
+def test_indexed_activation_matches_full_scan(hooks, ctx):
+    store = empty_store()
+    for hook in hooks:
+        store = insert_hook(hook, store)
+    activated = [m.match_hook.hook_id for m in activate(store, ctx)]
+    scanned = [h.hook_id for h in store.hooks.values() if eval_condition(h.hook_condition, ctx)]
+    assert activated == scanned
+    direct = HookStore(hooks=dict(store.hooks))
+    assert [m.match_hook.hook_id for m in activate(direct, ctx)] == scanned
+    if hooks:
+        # delete_hook leaves the id in the indices; activation must skip it.
+        pruned = delete_hook(hooks[0].hook_id, store)
+        assert [m.match_hook.hook_id for m in activate(pruned, ctx)] == [i for i in scanned if i != hooks[0].hook_id]
+
+
+@given(st.lists(hook_strategy(), max_size=10), st.integers(min_value=0, max_value=10), context_strategy())
+def test_eviction_drops_oldest_hooks(hooks, n, ctx):
+    store = empty_store()
+    for hook in hooks:
+        store = insert_hook(hook, store)
+    evicted = store_evict(n, store)
+    assert list(evicted.hooks) == list(store.hooks)[n:]
+    assert all(hook_id in evicted.hooks for ids in evicted.indices.values() for hook_id in ids)
+    activated = {m.match_hook.hook_id for m in activate(evicted, ctx)}
+    assert activated == {h.hook_id for h in evicted.hooks.values() if eval_condition(h.hook_condition, ctx)}
+
+
+@given(hook_strategy(), context_strategy())
+def test_compiled_predicate_matches_eval(hook, ctx):
+    assert hook.hook_predicate(ctx) == eval_condition(hook.hook_condition, ctx)
+    assert compile_condition(hook.hook_condition)(ctx) == eval_condition(hook.hook_condition, ctx)
+
+
+@pytest.mark.parametrize("connective", [andP, orP])
+@pytest.mark.parametrize("n", [500, 3000])
+def test_hooks_build_on_deep_conditions(connective, n):
+    features = {Feature.get("current_text", "text"): TextValue("7")}
+    ctx = Context(features=features, time=datetime(2025, 1, 1, tzinfo=UTC), app=None)
+    chain = reduce(connective, [hasText(str(i)) for i in range(n)])
+    # Alternating connectives nest the tree itself, well past the generated-source depth.
+    nested = reduce(lambda acc, i: (andP if i % 2 else orP)(hasText(str(i)), acc), range(n // 10), TrueP())
+    for condition in (chain, nested):
+        hook = make_hook("deep", condition)
+        assert hook.hook_predicate(ctx) == eval_condition(condition, ctx)
+
+
+@pytest.mark.parametrize("connective", [andP, orP])
+def test_long_chains_compile_to_one_expression(connective):
+    # One connective repeated does not nest the generated source, however long the chain.
+    chain = reduce(connective, [hasText(str(i)) for i in range(3000)])
+    assert compile_condition(chain).__code__.co_filename == "<condition>"
+
+
+@given(st.lists(hook_strategy(), max_size=10), context_strategy())
+def test_fused_activation_matches_prioritize(hooks, ctx):
+    store = empty_store()
+    for hook in hooks:
+        store = insert_hook(hook, store)
+    policy = default_policy()
+    assert activate_best(policy, store, ctx) == prioritize(policy, activate(store, ctx))
 
 
 @given(st.lists(hook_match_strategy(), min_size=1, max_size=20))
@@ -207,11 +327,26 @@ def test_de_morgan(c1, c2, ctx):
     assert eval_condition(notP(orP(c1, c2)), ctx) == eval_condition(andP(notP(c1), notP(c2)), ctx)
 
 
+@given(condition_strategy(), st.lists(context_strategy(), max_size=5), context_strategy())
+def test_profile_reordering_preserves_meaning(c, sample, ctx):
+    optimized = optimize_condition(c, sample)
+    assert normalize_condition(optimized) == normalize_condition(c)
+    assert eval_condition(optimized, ctx) == eval_condition(c, ctx)
+
+
 @given(condition_strategy())
 def test_normalization_idempotence(c):
     assert normalize_condition(normalize_condition(c)) == normalize_condition(c)
 
 
+@given(condition_strategy(), condition_strategy(), st.text(min_size=1, max_size=5))
+def test_normalization_absorbs_redundant_terms(a, b, text):
+    assert normalize_condition(andP(a, orP(a, b))) == normalize_condition(a)
+    assert normalize_condition(orP(a, andP(b, a))) == normalize_condition(a)
+    assert normalize_condition(andP(a, a)) == normalize_condition(a)
+    assert normalize_condition(andP(hasText(text), notP(hasText(text)))) == FalseP()
+
+
 @given(st.integers(min_value=0, max_value=5))
 def test_cascading_depth_limit(depth):
     policy = default_policy()
@@ -234,3 +369,228 @@ def test_negative_rl_bounds(alpha, score):
     uncorrected = negative_rl_update(alpha, score, False)
     assert 0.0 <= corrected <= 1.0
     assert 0.0 <= uncorrected <= 1.0
+
+
+@given(
+    st.floats(min_value=0.001, max_value=0.999, allow_infinity=False, allow_nan=False),
+    st.lists(st.tuples(hook_strategy(), st.booleans()), max_size=10),
+)
+def test_batch_stats_update_matches_scalar(alpha, pairs):
+    hooks = [h for h, _ in pairs]
+    corrections = [c for _, c in pairs]
+    batched = update_stats_batch(alpha, hooks, corrections)
+    assert [h.hook_stats for h in batched] == [update_stats(alpha, h, c).hook_stats for h, c in pairs]
+
+
+@given(st.lists(hook_strategy(), min_size=1, max_size=6))
+def test_nary_composition_matches_fold(hooks):
+    assert compose_nested_all(hooks) == reduce(compose_nested, hooks)
+    assert compose_flat_all(hooks) == reduce(compose_flat, hooks)
+
+
+@given(st.lists(st.text(alphabet="ab\x00", max_size=4), max_size=3), st.text(alphabet="ab\x00", max_size=3))
+def test_text_blob_matches_feature_scan(texts, needle):
+    features = {Feature(f"text_{i}", "text"): TextValue(t) for i, t in enumerate(texts)}
+    ctx = Context(features=features, time=datetime(2025, 1, 1, tzinfo=UTC), app=None)
+    assert context_has_text(needle, ctx) == any(needle in t for t in texts)
+
+
+@given(st.lists(hook_strategy(), max_size=8), st.lists(hook_strategy(), max_size=8))
+def test_builder_matches_sequential_insert(initial, extra):
+    store = reduce(lambda s, h: insert_hook(h, s), initial, empty_store())
+    builder = HookStoreBuilder.from_store(store)
+    for hook in extra:
+        builder.add(hook)
+    expected = reduce(lambda s, h: insert_hook(h, s), extra, store)
+    assert builder.freeze() == expected
+    assert bulk_insert(extra, store) == expected
+
+
+@given(condition_strategy(), condition_strategy())
+def test_condition_key_is_boolean_canonical(a, b):
+    assert condition_key(a) == condition_key(normalize_condition(a))
+    assert condition_key(andP(a, orP(a, b))) == condition_key(a)
+    assert condition_key(orP(a, andP(b, a))) == condition_key(a)
+    assert condition_key(andP(a, b)) == condition_key(andP(b, a))
+
+
+@given(condition_strategy())
+def test_condition_key_detects_constants(cond):
+    assert condition_key(andP(cond, notP(cond))) == condition_key(FalseP())
+    assert condition_key(orP(cond, notP(cond))) == condition_key(TrueP())
+
+
+@given(st.integers(min_value=1, max_value=3000))
+def test_specificity_handles_deep_chains(n):
+    chain = reduce(andP, [inApp(f"app{i}") for i in range(n)])
+    assert calculate_specificity(chain) == pytest.approx(0.4 * n)
+    assert calculate_specificity(orP(chain, hasText("x"))) == pytest.approx(min(0.4 * n, 0.3))
+
+
+def test_condition_key_falls_back_past_the_budget():
+    # Under the structural atom order this OR of pairs has an exponential basic form.
+    pairs = [andP(hasText(f"a{i}"), hasText(f"b{i}")) for i in range(18)]
+    wide = reduce(orP, pairs)
+    assert condition_key(wide) == normalize_condition(wide)
+    assert condition_key(reduce(orP, reversed(pairs))) == condition_key(wide)
+
+
+def conjuncts(cond):
+    if isinstance(cond, AndP):
+        return conjuncts(cond.left) + conjuncts(cond.right)
+    return [cond]
+
+
+CHEAPEST_FIRST = {InApp: 0, FeatureEq: 1, HasText: 2}
+
+
+@given(
+    st.permutations(
+        [
+            inApp("email"),
+            featureEq(Feature.get("current_text", "text"), TextValue("draft")),
+            hasText("hello"),
+            hasText("world"),
+        ]
+    )
+)
+def test_normalized_conjuncts_are_cheapest_first(atoms):
+    # App checks are cheaper than feature lookups, which are cheaper than text searches.
+    terms = conjuncts(normalize_condition(reduce(andP, atoms)))
+    assert sorted(terms, key=lambda t: CHEAPEST_FIRST[type(t)]) == terms
+    assert set(terms) == set(atoms)
+
+
+@pytest.mark.parametrize("profiled", [False, True])
+def test_hook_predicates_check_cheap_atoms_first(monkeypatch, profiled):
+    checked = []
+    monkeypatch.setattr(semantics, "context_has_text", lambda text, ctx: checked.append(text) or True)
+    # A text unique to this case, so no predicate compiled before the patch is reused.
+    probe = f"evaluation-order-probe-{profiled}"
+    hook = make_hook("ordered", andP(hasText(probe), inApp("email")), profiled=profiled)
+    ctx = Context(features={}, time=datetime(2025, 1, 1, tzinfo=UTC), app="calendar")
+    assert not hook.hook_predicate(ctx)
+    # The app check rejects first, unless optimize_store has fixed the authored order.
+    assert checked == ([probe] if profiled else [])
+
+
+@given(condition_strategy(), condition_strategy(), st.lists(context_strategy(), min_size=1, max_size=4))
+def test_basic_form_predicates_match_eval(a, b, contexts):
+    # Sharing a between both branches makes an atom repeat, so the basic form is used.
+    condition = orP(andP(a, b), andP(a, notP(b)))
+    hook = make_hook("shared", condition)
+    for ctx in contexts:
+        assert hook.hook_predicate(ctx) == eval_condition(condition, ctx)
+
+
+def test_basic_form_predicates_test_repeated_atoms_once(monkeypatch):
+    checked = []
+    monkeypatch.setattr(semantics, "context_has_text", lambda text, ctx: checked.append(text) or False)
+    # Sorts before the other texts, so the basic form tests it first.
+    shared = "a-repeated-probe"
+    condition = orP(andP(hasText(shared), hasText("probe-b")), andP(hasText(shared), hasText("probe-c")))
+    hook = make_hook("repeated", condition)
+    assert not hook.hook_predicate(empty_context())
+    assert checked == [shared]
+
+
+@given(st.text(max_size=10), st.sampled_from(["email", "calendar", "logger"]))
+def test_atoms_are_interned(text, app):
+    assert hasText(text) is hasText(text)
+    assert inApp(app) is inApp(app)
+    assert normalize_condition(andP(HasText(text), InApp(app))) == andP(inApp(app), hasText(text))
+
+
+@given(st.lists(hook_strategy(), max_size=6))
+def test_plan_concat_all_matches_fold(hooks):
+    plans = [h.hook_action.action_plan for h in hooks]
+    assert OutcomePlan.concat_all(plans) == reduce(lambda a, b: a + b, plans, OutcomePlan.empty())
+
+
+@given(st.lists(st.text(min_size=1, max_size=6), min_size=1, max_size=40, unique=True))
+def test_normalized_chains_are_balanced(texts):
+    def depth(c):
+        return 1 + max(depth(c.left), depth(c.right)) if isinstance(c, AndP) else 0
+
+    normalized = normalize_condition(reduce(andP, [hasText(t) for t in texts]))
+    assert depth(normalized) == (len(texts) - 1).bit_length()
+
+
+@given(condition_strategy(), st.lists(context_strategy(), max_size=8))
+def test_batch_evaluation_matches_eval(cond, contexts):
+    assert eval_condition_batch(cond, contexts) == [eval_condition(cond, ctx) for ctx in contexts]
+
+
+@given(context_strategy())
+def test_contexts_are_frozen_and_hashable(ctx):
+    twin = Context(features=dict(ctx.features), time=ctx.time, app=ctx.app)
+    assert twin == ctx and hash(twin) == hash(ctx)
+    with pytest.raises(TypeError):
+        ctx.features[Feature.get("extra", "text")] = TextValue("x")
+
+
+@given(context_strategy(), st.booleans())
+def test_contexts_copy_their_features(ctx, as_view):
+    source = dict(ctx.features)
+    built = Context(features=MappingProxyType(source) if as_view else source, time=ctx.time, app=ctx.app)
+    blob, digest = built.text_blob, hash(built)
+    source[Feature.get("extra", "text")] = TextValue("x")
+    assert built == ctx and built.text_blob == blob and hash(built) == digest
+
+
+ROUND_TRIPS = (copy.copy, copy.deepcopy, lambda value: pickle.loads(pickle.dumps(value)))
+
+
+@given(context_strategy(), st.sampled_from(ROUND_TRIPS))
+def test_contexts_survive_copy_and_pickle(ctx, round_trip):
+    for value in (ctx, empty_context()):
+        restored = round_trip(value)
+        assert restored == value and hash(restored) == hash(value)
+        assert restored.text_blob == value.text_blob
+    plan = OutcomePlan.empty()
+    assert round_trip(plan) == plan
+
+
+@given(st.integers(min_value=1, max_value=3000))
+def test_deep_conditions_compare_without_recursion(n):
+    def build(last):
+        return reduce(lambda acc, i: (AndP if i % 2 else OrP)(HasText(str(i)), acc), range(n), HasText(last))
+
+    assert build("end") == build("end")
+    assert build("end") != build("other")
+    assert {build("end"): 1}.get(build("end")) == 1
+
+
+def stale_hash(value):
+    # Stands in for an object pickled under another PYTHONHASHSEED.
+    object.__setattr__(value, "_hash", hash(value) + 1)
+    return value
+
+
+@given(st.text(max_size=10), st.sampled_from(ROUND_TRIPS))
+def test_features_rehash_after_copy_and_pickle(name, round_trip):
+    fresh = Feature(name, "text")
+    restored = round_trip(stale_hash(Feature(name, "text")))
+    assert restored == fresh and hash(restored) == hash(fresh)
+
+
+# A shallow copy shares the (stale) children, so only deep round trips apply here.
+@given(st.text(max_size=10), st.sampled_from(["email", "calendar"]), st.sampled_from(ROUND_TRIPS[1:]))
+def test_composite_conditions_rehash_after_copy_and_pickle(text, app, round_trip):
+    def build():
+        # Built directly: marking pooled atoms stale would leak into other tests.
+        feature = FeatureEq(Feature("current_text", "text"), TextValue(text))
+        return OrP(AndP(feature, inApp(app)), NotP(hasText(text)))
+
+    stale = build()
+    for node in (stale.left.left.feature, stale.left, stale.right, stale):
+        stale_hash(node)
+    restored = round_trip(stale)
+    assert restored == build() and {build(): 1}.get(restored) == 1
+
+
+@given(hook_strategy(), context_strategy(), st.sampled_from(ROUND_TRIPS))
+def test_hooks_survive_copy_and_pickle(hook, ctx, round_trip):
+    restored = round_trip(hook)
+    assert restored == hook
+    assert restored.hook_predicate(ctx) == hook.hook_predicate(ctx)